@@ -1,25 +1,222 @@
+import diskcache
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import streamlit as st
 import time
-import openai
+import hashlib
 import textwrap
+import string
+import functools
+import queue
+import threading
 import concurrent.futures
+import itertools
+import collections
 import logging
 
 # Set up logging
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
 
 # Set page title and icon
 st.set_page_config(page_title="ClickUp Workspace Analysis", page_icon="🚀", layout="wide")
 
 deepseek_api_key = st.secrets.get("DEEPSEEK_API_KEY")
 
+# DeepSeek client configuration, built once at startup rather than per request
+DEEPSEEK_URL = "https://api.deepseek.com/chat/completions"  # Replace with the actual DeepSeek API endpoint
+DEEPSEEK_MODEL = "deepseek-chat"  # Replace with the correct model name
+deepseek_headers = {
+    "Authorization": f"Bearer {deepseek_api_key}",
+    "Content-Type": "application/json"
+}
+
+# ClickUp crawl tuning: workers in the shared crawl pool and (connect, read) timeouts in seconds
+MAX_WORKERS = 32
+REQUEST_TIMEOUT = (3.05, 15)
+
+# ClickUp endpoints; the templated ones are bound `str.format` methods taking the parent id
+CLICKUP_TEAMS_URL = "https://api.clickup.com/api/v2/team"
+CLICKUP_SPACES_URL = "https://api.clickup.com/api/v2/team/{}/space".format
+CLICKUP_FOLDERS_URL = "https://api.clickup.com/api/v2/space/{}/folder".format
+CLICKUP_LISTS_URL = "https://api.clickup.com/api/v2/folder/{}/list".format
+CLICKUP_FOLDERLESS_LISTS_URL = "https://api.clickup.com/api/v2/space/{}/list".format
+CLICKUP_TASKS_URL = "https://api.clickup.com/api/v2/team/{}/task".format
+
+# Query params that leave archived folders and lists (and everything beneath them) out of the crawl
+ARCHIVED_EXCLUDED = {"archived": "false"}
+
+# Number of list ids sent per filtered-tasks request, keeping the query string to a safe length
+LISTS_PER_TASK_REQUEST = 100
+
+# Query params shared by every filtered-tasks request; the list ids and page number are added per call
+TASK_QUERY = {"archived": "false", "include_closed": "true", "subtasks": "true"}
+
+# ClickUp returns tasks 100 per page; once a batch has more than one page, this many are requested in parallel
+TASK_PAGE_SIZE = 100
+TASK_PAGE_WINDOW = 4
+
+# Task classification used by the workspace summary
+DONE_STATUSES = frozenset({"closed", "done", "completed"})
+HIGH_PRIORITIES = frozenset({"urgent", "high"})
+
+@st.cache_resource
+def build_session():
+    """
+    Builds a requests session with a connection pool so TCP/TLS handshakes are reused across calls.
+    Rate-limited (429) and transient server errors are retried with exponential backoff, for GETs and POSTs.
+    Cached as a resource, so one session is shared by every script rerun and user session.
+    """
+    session = requests.Session()
+    retry = Retry(
+        total=5,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        # Chat completion POSTs have no side effects, so they are as safe to retry as the ClickUp GETs
+        allowed_methods=frozenset({"GET", "POST"}),
+        respect_retry_after_header=True
+    )
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=retry)
+    session.mount("https://", adapter)
+    return session
+
+session = build_session()
+
+@st.cache_resource
+def build_crawl_executor():
+    """
+    Builds the thread pool shared by every workspace crawl in this process. Crawls are driven
+    level by level from the calling thread, so pool workers never wait on each other.
+    """
+    return concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS)
+
+crawl_executor = build_crawl_executor()
+
+class RateLimiter:
+    """
+    Sliding-window limiter shared by all crawls made with the same API token. Allows `limit` calls
+    in any trailing window of `per` seconds, so crawls that fit in the budget run at full speed
+    while no window ever exceeds it.
+    """
+    def __init__(self, limit, per):
+        self.limit = limit
+        self.per = per
+        self.calls = collections.deque()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks until a call fits in the window and records it.
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                while self.calls and now - self.calls[0] >= self.per:
+                    self.calls.popleft()
+                if len(self.calls) < self.limit:
+                    self.calls.append(now)
+                    return
+                # Sleep until the oldest call in the window expires
+                wait = self.per - (now - self.calls[0])
+            time.sleep(wait)
+
+# ClickUp allows 100 requests per minute per token on most plans; higher tiers can raise the budget
+# with the CLICKUP_RATE_LIMIT secret
+CLICKUP_RATE_LIMIT = int(st.secrets.get("CLICKUP_RATE_LIMIT", 90))
+
+@st.cache_resource
+def build_rate_limiters():
+    """
+    Builds the process-wide registry of ClickUp rate limiters, keyed by the sha256 of the API token.
+    """
+    return {}
+
+clickup_rate_limiters = build_rate_limiters()
+
+def rate_limiter_for(api_key_hash):
+    """
+    Returns the rate limiter of the ClickUp token with the given sha256, so that every crawl made
+    with one token shares its budget. Tokens are taken on the thread driving the crawl, never in a
+    pool worker, so a throttled token cannot hold shared workers while other users wait.
+    """
+    limiter = clickup_rate_limiters.get(api_key_hash)
+    if limiter is None:
+        # setdefault is atomic, so concurrent first calls still end up sharing one limiter
+        limiter = clickup_rate_limiters.setdefault(api_key_hash, RateLimiter(limit=CLICKUP_RATE_LIMIT, per=60.0))
+    return limiter
+
+def get_json(url, headers, params=None):
+    """
+    Issues a GET on the shared session and returns the JSON body decoded with orjson. Callers take
+    a rate-limit token first. Raises `requests.HTTPError` for non-2xx responses instead of handing
+    back an error payload.
+    """
+    start_time = time.time()
+    response = session.get(url, headers=headers, params=params, timeout=REQUEST_TIMEOUT)
+    # Called for every request of the crawl: lazy %-formatting at DEBUG keeps it free when disabled
+    logger.debug("API call to %s took %.2f seconds", url, time.time() - start_time)
+    response.raise_for_status()
+    # orjson decodes the large task payloads several times faster than the stdlib json module
+    return orjson.loads(response.content)
+
+@st.cache_resource
+def open_llm_cache():
+    """
+    Opens the disk-backed cache of LLM responses, keyed by `llm_cache_key`.
+    """
+    return diskcache.Cache(".llm_cache")
+
+llm_cache = open_llm_cache()
+LLM_CACHE_TTL = 86400
+# Company profiles depend only on the name and change slowly, so they are kept for a week
+PROFILE_CACHE_TTL = 7 * 86400
+
+def normalize_for_cache(text):
+    """
+    Canonicalizes text for use in cache keys, so inputs differing only in case or spacing
+    (e.g. "Sales" and "  sales ") share a cache entry. Punctuation is kept, since it can
+    change the meaning (e.g. "C++" and "C#").
+    """
+    return " ".join(text.casefold().split())
+
+def llm_cache_key(messages):
+    """
+    Builds the LLM cache key from the model and the normalized content of each chat message.
+    """
+    contents = "|".join(normalize_for_cache(message["content"]) for message in messages)
+    return hashlib.sha256(f"{DEEPSEEK_MODEL}|{contents}".encode()).hexdigest()
+
+# (connect, read) timeouts in seconds for DeepSeek calls; the read timeout applies between streamed chunks
+LLM_TIMEOUT = (3.05, 60)
+
+def prefetch(chunks):
+    """
+    Starts draining a chunk iterator on its own daemon thread and returns an iterator that replays
+    the chunks as they arrive, so the underlying call runs while the page renders. A thread per
+    call, rather than a shared pool, keeps one session's generation from queueing behind another's.
+    """
+    buffer = queue.Queue()
+
+    def drain():
+        try:
+            for chunk in chunks:
+                buffer.put(chunk)
+        finally:
+            buffer.put(None)
+
+    threading.Thread(target=drain, daemon=True).start()
+    return (chunk for chunk in iter(buffer.get, None))
+
 def get_company_info(company_name):
     """
     Generates a short company profile for the given company name using DeepSeek.
+    Yields the text in chunks as it is generated, so it can be rendered with `st.write_stream`.
     """
     if not company_name:
-        return "No company information provided."
+        yield "No company information provided."
+        return
     
     prompt = textwrap.dedent(f"""
         Please build a short company profile for {company_name}. The profile should include the following sections in markdown:
@@ -32,248 +229,341 @@ def get_company_info(company_name):
     
     try:
         if deepseek_api_key:
-            # Prepare the payload for DeepSeek API
-            payload = {
-                "model": "deepseek-chat",  # Replace with the correct model name
-                "messages": [
-                    {"role": "system", "content": "You are a helpful assistant."},
-                    {"role": "user", "content": prompt}
-                ]
-            }
-            headers = {
-                "Authorization": f"Bearer {deepseek_api_key}",
-                "Content-Type": "application/json"
-            }
-            # Make the API request to DeepSeek
-            response = requests.post(
-                "https://api.deepseek.com/chat/completions",  # Replace with the actual DeepSeek API endpoint
-                json=payload,
-                headers=headers
-            )
-            if response.status_code == 200:
-                return response.json()["choices"][0]["message"]["content"]
-            else:
-                return f"Error fetching company details: {response.status_code} - {response.text}"
+            yield from stream_completion("You are a helpful assistant.", prompt, ttl=PROFILE_CACHE_TTL)
         else:
-            return "No AI service available for generating company profile."
+            yield "No AI service available for generating company profile."
     except Exception as e:
-        return f"Error fetching company details: {str(e)}"
+        yield f"Error fetching company details: {str(e)}"
 
 def fetch_workspaces(api_key):
     """
     Fetches the list of workspaces from the ClickUp API.
+    Results are cached per API key, since this runs on every rerun of the script.
+    Returns an empty mapping if ClickUp rejects the key, and None if the lookup failed otherwise.
     """
-    url = "https://api.clickup.com/api/v2/team"
-    headers = {"Authorization": api_key}
-
     try:
-        start_time = time.time()
-        response = requests.get(url, headers=headers)
-        logging.info(f"API call to {url} took {time.time() - start_time:.2f} seconds")
-        if response.status_code == 200:
-            teams = response.json().get("teams", [])
-            return {team["id"]: team["name"] for team in teams}
-        else:
-            return None
+        api_key_hash = hashlib.sha256(api_key.encode()).hexdigest()
+        return list_workspaces(api_key_hash, api_key)
+    except requests.HTTPError as e:
+        if e.response.status_code == 401:
+            logger.warning("ClickUp rejected the API key")
+            return {}
+        logger.error("Exception: %s", e)
+        return None
     except Exception as e:
-        logging.error(f"Exception: {str(e)}")
+        logger.error("Exception: %s", e)
         return None
 
+@st.cache_data(ttl=300, show_spinner=False, max_entries=256)
+def list_workspaces(api_key_hash, _api_key):
+    """
+    Requests the workspaces (teams) the API key can access, as a mapping of id to name.
+    `_api_key` is excluded from the cache key and exceptions propagate so failures are never cached.
+    """
+    headers = {"Authorization": _api_key}
+    rate_limiter_for(api_key_hash).acquire()
+    teams = get_json(CLICKUP_TEAMS_URL, headers).get("teams", [])
+    return {team["id"]: team["name"] for team in teams}
+
 def fetch_workspace_details(api_key, team_id):
     """
     Fetches workspace details including spaces, folders, lists, and tasks.
+    Results are cached per API key and workspace, so repeated analyses skip the crawl.
     """
-    headers = {"Authorization": api_key}
-    
     try:
-        spaces_url = f"https://api.clickup.com/api/v2/team/{team_id}/space"
-        start_time = time.time()
-        spaces_response = requests.get(spaces_url, headers=headers).json()
-        logging.info(f"API call to {spaces_url} took {time.time() - start_time:.2f} seconds")
-        spaces = spaces_response.get("spaces", [])
-        
-        space_count = len(spaces)
-        folder_count, list_count, task_count = 0, 0, 0
-        completed_tasks, overdue_tasks, high_priority_tasks = 0, 0, 0
-
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            future_to_space = {executor.submit(fetch_space_details, api_key, space["id"]): space for space in spaces}
-            for future in concurrent.futures.as_completed(future_to_space):
-                space_result = future.result()
-                folder_count += space_result['folder_count']
-                list_count += space_result['list_count']
-                task_count += space_result['task_count']
-                completed_tasks += space_result['completed_tasks']
-                overdue_tasks += space_result['overdue_tasks']
-                high_priority_tasks += space_result['high_priority_tasks']
-        
-        task_completion_rate = (completed_tasks / task_count * 100) if task_count > 0 else 0
-        
-        return {
-            "🪐 Spaces": space_count,
-            "📂 Folders": folder_count,
-            "🗂️ Lists": list_count,
-            "📝 Total Tasks": task_count,
-            "⚠️ Overdue Tasks": overdue_tasks,
-            "🔥 High Priority Tasks": high_priority_tasks
-        }
+        api_key_hash = hashlib.sha256(api_key.encode()).hexdigest()
+        return crawl_workspace(api_key_hash, team_id, api_key)
+    except requests.HTTPError as e:
+        return {"error": f"ClickUp API error: {e.response.status_code} - {e.response.text[:200]}"}
+    except requests.RequestException as e:
+        return {"error": f"ClickUp API request failed: {str(e)}"}
     except Exception as e:
         return {"error": f"Exception: {str(e)}"}
 
-def fetch_space_details(api_key, space_id):
+@st.cache_data(ttl=300, show_spinner=False, max_entries=256)
+def crawl_workspace(api_key_hash, team_id, _api_key):
     """
-    Fetches details for a specific space including folders, lists, and tasks.
+    Crawls the workspace hierarchy one level at a time, fetching every node of a level concurrently.
+    The API key hash stands in for the raw key in the cache key; `_api_key` is excluded from hashing.
+    Exceptions propagate so that failed crawls are never cached.
     """
-    headers = {"Authorization": api_key}
-    folder_count, list_count, task_count = 0, 0, 0
-    completed_tasks, overdue_tasks, high_priority_tasks = 0, 0, 0
+    # Built once per crawl and shared by every request; the session itself is shared across users
+    headers = {"Authorization": _api_key}
+    # Single reference time for the overdue check, taken before any task is fetched
+    now_ms = int(time.time() * 1000)
+    limiter = rate_limiter_for(api_key_hash)
+    
+    limiter.acquire()
+    spaces_response = get_json(CLICKUP_SPACES_URL(team_id), headers)
+    spaces = spaces_response.get("spaces", [])
 
-    folders_url = f"https://api.clickup.com/api/v2/space/{space_id}/folder"
-    start_time = time.time()
-    folders_response = requests.get(folders_url, headers=headers).json()
-    logging.info(f"API call to {folders_url} took {time.time() - start_time:.2f} seconds")
-    folders = folders_response.get("folders", [])
-    folder_count += len(folders)
+    # Folderless lists hang directly off the spaces, so they are requested before the folder waves
+    # and collected once those are done
+    folderless_lists = crawl_map(crawl_executor, limiter, fetch_space_lists, itertools.repeat(headers), [space["id"] for space in spaces])
+    folders = crawl_level(crawl_executor, limiter, fetch_space_folders, headers, spaces)
+    lists = crawl_level(crawl_executor, limiter, fetch_folder_lists, headers, folders)
+    lists.extend(lst for space_lists in folderless_lists for lst in space_lists)
+    list_ids = [lst["id"] for lst in lists]
+    batches = [list_ids[i:i + LISTS_PER_TASK_REQUEST] for i in range(0, len(list_ids), LISTS_PER_TASK_REQUEST)]
+    task_count, completed_tasks, overdue_tasks, high_priority_tasks = crawl_tasks(
+        crawl_executor, limiter, headers, team_id, batches, now_ms
+    )
+    logger.debug("Total tasks: %d, Completed tasks: %d", task_count, completed_tasks)
     
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        future_to_folder = {executor.submit(fetch_folder_details, api_key, folder["id"]): folder for folder in folders}
-        for future in concurrent.futures.as_completed(future_to_folder):
-            folder_result = future.result()
-            list_count += folder_result['list_count']
-            task_count += folder_result['task_count']
-            completed_tasks += folder_result['completed_tasks']
-            overdue_tasks += folder_result['overdue_tasks']
-            high_priority_tasks += folder_result['high_priority_tasks']
+    task_completion_rate = (completed_tasks / task_count * 100) if task_count > 0 else 0
     
     return {
-        'folder_count': folder_count,
-        'list_count': list_count,
-        'task_count': task_count,
-        'completed_tasks': completed_tasks,
-        'overdue_tasks': overdue_tasks,
-        'high_priority_tasks': high_priority_tasks
+        "🪐 Spaces": len(spaces),
+        "📂 Folders": len(folders),
+        "🗂️ Lists": len(lists),
+        "📝 Total Tasks": task_count,
+        "⚠️ Overdue Tasks": overdue_tasks,
+        "🔥 High Priority Tasks": high_priority_tasks
     }
 
-def fetch_folder_details(api_key, folder_id):
+def summarize_tasks(tasks, now_ms):
     """
-    Fetches details for a specific folder including lists and tasks.
+    Counts the completed, overdue, and high-priority tasks in a single pass over the task list.
+    Only open tasks count as overdue or high priority.
     """
-    headers = {"Authorization": api_key}
-    list_count, task_count = 0, 0
     completed_tasks, overdue_tasks, high_priority_tasks = 0, 0, 0
+    for task in tasks:
+        # ClickUp status types are lowercase: "open", "custom", "done", or "closed"
+        if (task.get("status") or {}).get("type") in DONE_STATUSES:
+            completed_tasks += 1
+            # Closed tasks are fetched for the totals but are never overdue or pending high priority
+            continue
+        due_date = task.get("due_date")
+        if due_date and int(due_date) < now_ms:
+            overdue_tasks += 1
+        # ClickUp returns priority as an object, e.g. {"priority": "high", ...}, or null
+        if (task.get("priority") or {}).get("priority") in HIGH_PRIORITIES:
+            high_priority_tasks += 1
+    return completed_tasks, overdue_tasks, high_priority_tasks
 
-    lists_url = f"https://api.clickup.com/api/v2/folder/{folder_id}/list"
-    start_time = time.time()
-    lists_response = requests.get(lists_url, headers=headers).json()
-    logging.info(f"API call to {lists_url} took {time.time() - start_time:.2f} seconds")
-    lists = lists_response.get("lists", [])
-    list_count += len(lists)
-    
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        future_to_list = {executor.submit(fetch_list_details, api_key, lst["id"]): lst for lst in lists}
-        for future in concurrent.futures.as_completed(future_to_list):
-            list_result = future.result()
-            task_count += list_result['task_count']
-            completed_tasks += list_result['completed_tasks']
-            overdue_tasks += list_result['overdue_tasks']
-            high_priority_tasks += list_result['high_priority_tasks']
-    
-    return {
-        'list_count': list_count,
-        'task_count': task_count,
-        'completed_tasks': completed_tasks,
-        'overdue_tasks': overdue_tasks,
-        'high_priority_tasks': high_priority_tasks
-    }
+def crawl_map(executor, limiter, fetch, *iterables):
+    """
+    Calls `fetch` with each set of arguments taken from `iterables` on the crawl pool and returns an
+    iterator of the results in order. A wave of a single call runs on the calling thread instead,
+    where handing it to the pool would only add a hop. Each call's rate-limit token is taken here,
+    before submission, so pool workers never sleep on one token's budget.
+    """
+    calls = list(zip(*iterables))
+    if len(calls) == 1:
+        limiter.acquire()
+        return iter([fetch(*calls[0])])
+    futures = []
+    for args in calls:
+        limiter.acquire()
+        futures.append(executor.submit(fetch, *args))
+    return (future.result() for future in futures)
 
-def fetch_list_details(api_key, list_id):
+def crawl_level(executor, limiter, fetch, headers, parents):
     """
-    Fetches details for a specific list including tasks.
+    Runs `fetch` for every parent concurrently and flattens the returned children into one list.
     """
-    headers = {"Authorization": api_key}
-    task_count = 0
-    completed_tasks, overdue_tasks, high_priority_tasks = 0, 0, 0
+    results = crawl_map(executor, limiter, fetch, itertools.repeat(headers), [parent["id"] for parent in parents])
+    return [child for children in results for child in children]
 
-    tasks_url = f"https://api.clickup.com/api/v2/list/{list_id}/task"
-    start_time = time.time()
-    params = {
-        "archived": "false",
-        "subtasks": "true"
-    }
-    tasks_response = requests.get(tasks_url, headers=headers, params=params).json()
-    logging.info(f"API call to {tasks_url} took {time.time() - start_time:.2f} seconds")
-    tasks = tasks_response.get("tasks", [])
-    task_count += len(tasks)
+def fetch_space_folders(headers, space_id):
+    """
+    Fetches the folders of a specific space.
+    """
+    folders_response = get_json(CLICKUP_FOLDERS_URL(space_id), headers, params=ARCHIVED_EXCLUDED)
+    return folders_response.get("folders", [])
+
+def fetch_space_lists(headers, space_id):
+    """
+    Fetches the folderless lists of a specific space.
+    """
+    lists_response = get_json(CLICKUP_FOLDERLESS_LISTS_URL(space_id), headers, params=ARCHIVED_EXCLUDED)
+    return lists_response.get("lists", [])
+
+def fetch_folder_lists(headers, folder_id):
+    """
+    Fetches the lists of a specific folder.
+    """
+    lists_response = get_json(CLICKUP_LISTS_URL(folder_id), headers, params=ARCHIVED_EXCLUDED)
+    return lists_response.get("lists", [])
+
+def crawl_tasks(executor, limiter, headers, team_id, batches, now_ms):
+    """
+    Fetches every page of tasks for the given batches of list ids and returns the total, completed,
+    overdue, and high-priority task counts. The first page of every batch is requested concurrently;
+    batches with more pages then fetch the next `TASK_PAGE_WINDOW` pages at once, stopping at the
+    first page ClickUp reports as the last.
+    """
+    totals = (0, 0, 0, 0)
+    pending = [(batch, 0) for batch in batches]
+    window = 1
+    while pending:
+        requested = [(batch, page) for batch, first_page in pending for page in range(first_page, first_page + window)]
+        results = crawl_map(
+            executor,
+            limiter,
+            fetch_task_page,
+            itertools.repeat(headers),
+            itertools.repeat(team_id),
+            [batch for batch, _ in requested],
+            [page for _, page in requested],
+            itertools.repeat(now_ms)
+        )
+        next_pending = []
+        for batch, first_page in pending:
+            pages = [next(results) for _ in range(window)]
+            for page_counts, is_last_page in pages:
+                totals = tuple(total + count for total, count in zip(totals, page_counts))
+                if is_last_page:
+                    break
+            else:
+                next_pending.append((batch, first_page + window))
+        pending = next_pending
+        window = TASK_PAGE_WINDOW
+    return totals
+
+def fetch_task_page(headers, team_id, list_ids, page, now_ms):
+    """
+    Fetches one page of tasks of the given lists, including subtasks and closed tasks, through the
+    workspace-level filtered tasks endpoint. Returns the page's task counts, summarized in the worker
+    so that only one page of tasks per request is ever held in memory, and whether this is the last page.
+    """
+    params = {**TASK_QUERY, "list_ids[]": list_ids, "page": page}
+    tasks_response = get_json(CLICKUP_TASKS_URL(team_id), headers, params=params)
+    page_tasks = tasks_response.get("tasks", [])
+    is_last_page = len(page_tasks) < TASK_PAGE_SIZE or bool(tasks_response.get("last_page"))
+    return (len(page_tasks), *summarize_tasks(page_tasks, now_ms)), is_last_page
+
+# Static instructions for the recommendations call. Sent as the system message ahead of the
+# per-request inputs so providers can serve the shared prefix from their prompt cache.
+RECOMMENDATIONS_SYSTEM_PROMPT = textwrap.dedent("""
+    You are a helpful assistant and ClickUp expert. The user will provide their company name, their company's use case, and the counts of their ClickUp workspace as key=value pairs (high_priority counts urgent and high priority tasks).
     
-    for task in tasks:
-        status = task.get("status", {}).get("type", "").lower()
-        logging.info(f"Task ID: {task['id']} - Status: {status}")
-        completed_tasks += 1 if status in ["closed", "done", "completed"] else 0
-        overdue_tasks += 1 if task.get("due_date") and int(task["due_date"]) < int(time.time() * 1000) else 0
-        high_priority_tasks += 1 if task.get("priority", "") in ["urgent", "high"] else 0
+    Please provide a detailed analysis in markdown with the following sections.
+    
+    ### 📈 Productivity Analysis
+    Evaluate the current workspace structure and workflow. Provide insights on how to optimize productivity by leveraging the workspace metrics and tailoring strategies to the specified use case.
+    
+    ### ✅ Actionable Recommendations
+    Suggest practical steps to improve efficiency and organization, addressing specific challenges highlighted by the workspace data and the unique requirements of the use case, along with considerations from what you know about the company.
+    
+    ### 🏆 Best Practices & Tips
+    Share industry-specific best practices and tips that can help maximize workflow efficiency for a company with this use case.
+    
+    ### 🛠️ Useful ClickUp Templates & Resources
+    Recommend relevant ClickUp templates and resources. Provide hyperlinks to useful resources on clickup.com, university.clickup.com, or help.clickup.com. Provide 5-8 links.
+""")
+
+# Compact names for the workspace metrics in the prompt, far fewer tokens than the display labels
+WORKSPACE_PROMPT_KEYS = {
+    "🪐 Spaces": "spaces",
+    "📂 Folders": "folders",
+    "🗂️ Lists": "lists",
+    "📝 Total Tasks": "tasks",
+    "⚠️ Overdue Tasks": "overdue",
+    "🔥 High Priority Tasks": "high_priority"
+}
 
-    logging.info(f"Total tasks: {task_count}, Completed tasks: {completed_tasks}")
+# Per-request inputs, appended after the static system prompt to keep the prefix cacheable
+RECOMMENDATIONS_USER_PROMPT = string.Template(textwrap.dedent("""
+    Company: $company_name
     
-    return {
-        'task_count': task_count,
-        'completed_tasks': completed_tasks,
-        'overdue_tasks': overdue_tasks,
-        'high_priority_tasks': high_priority_tasks
-    }
+    Use case: $use_case
+    
+    Workspace data:
+    $workspace_block
+""").strip())
 
-def get_ai_recommendations(use_case, company_profile, workspace_details):
+@functools.lru_cache(maxsize=128)
+def build_recommendations_prompt(use_case, company_name, workspace_items):
     """
-    Generates AI-powered recommendations based on workspace data, company profile, and use case using DeepSeek.
+    Builds the user message for the recommendations call from the use case, company name,
+    and workspace metrics given as a tuple of (label, value) pairs.
+    """
+    if workspace_items:
+        workspace_block = " ".join(f"{WORKSPACE_PROMPT_KEYS.get(label, label)}={value}" for label, value in workspace_items)
+    else:
+        workspace_block = "(No workspace data available)"
+    return RECOMMENDATIONS_USER_PROMPT.substitute(
+        company_name=company_name or "(Not provided)",
+        use_case=use_case,
+        workspace_block=workspace_block
+    )
+
+def get_ai_recommendations(use_case, company_name, workspace_details):
+    """
+    Generates AI-powered recommendations based on workspace data, company name, and use case using DeepSeek.
+    Yields the text in chunks as it is generated, so it can be rendered with `st.write_stream`.
     """
-    prompt = textwrap.dedent(f"""
-        Based on the following workspace data:
-        {workspace_details if workspace_details else "(No workspace data available)"}
-        
-        Considering the company's use case: "{use_case}"
-        And the following company profile:
-        {company_profile}
-        
-        Please provide a detailed analysis.
-        
-        <h3>📈 Productivity Analysis</h3>
-        Evaluate the current workspace structure and workflow. Provide insights on how to optimize productivity by leveraging the workspace metrics above and tailoring strategies to the specified use case.
-        
-        <h3>✅ Actionable Recommendations</h3>
-        Suggest practical steps to improve efficiency and organization, addressing specific challenges highlighted by the workspace data and the unique requirements of the use case, along with considerations from the company profile.
-        
-        <h3>🏆 Best Practices & Tips</h3>
-        Share industry-specific best practices and tips that can help maximize workflow efficiency for a company with this use case.
-        
-        <h3>🛠️ Useful ClickUp Templates & Resources</h3>
-        Recommend relevant ClickUp templates and resources. Provide hyperlinks to useful resources on clickup.com, university.clickup.com, or help.clickup.com. Provide 5-8 links.
-    """)
-    
     try:
         if deepseek_api_key:
-            # Prepare the payload for DeepSeek API
-            payload = {
-                "model": "deepseek-chat",  # Replace with the correct model name
-                "messages": [
-                    {"role": "system", "content": "You are a helpful assistant."},
-                    {"role": "user", "content": prompt}
-                ]
-            }
-            headers = {
-                "Authorization": f"Bearer {deepseek_api_key}",
-                "Content-Type": "application/json"
-            }
-            # Make the API request to DeepSeek
-            response = requests.post(
-                "https://api.deepseek.com/chat/completions",  # Replace with the actual DeepSeek API endpoint
-                json=payload,
-                headers=headers
-            )
-            if response.status_code == 200:
-                return response.json()["choices"][0]["message"]["content"]
-            else:
-                return f"⚠️ AI recommendations are not available: {response.status_code} - {response.text}"
+            workspace_items = tuple(workspace_details.items()) if workspace_details else ()
+            prompt = build_recommendations_prompt(use_case, company_name, workspace_items)
+            yield from stream_completion(RECOMMENDATIONS_SYSTEM_PROMPT, prompt)
     except Exception as e:
-        return f"⚠️ AI recommendations are not available: {str(e)}"
+        yield f"⚠️ AI recommendations are not available: {str(e)}"
+
+def stream_completion(system_prompt, prompt, ttl=LLM_CACHE_TTL):
+    """
+    Streams a DeepSeek chat completion, serving identical requests from the on-disk LLM cache for
+    `ttl` seconds. Raises on API errors so that failed responses are never cached.
+    """
+    # Prepare the payload for DeepSeek API
+    payload = {
+        "model": DEEPSEEK_MODEL,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ],
+        "stream": True
+    }
+    cache_key = llm_cache_key(payload["messages"])
+    cached = llm_cache.get(cache_key)
+    if cached is not None:
+        yield cached
+        return
+    
+    # Make the API request to DeepSeek
+    response = session.post(
+        DEEPSEEK_URL,
+        data=orjson.dumps(payload),
+        headers=deepseek_headers,
+        stream=True,
+        timeout=LLM_TIMEOUT
+    )
+    if response.status_code != 200:
+        raise RuntimeError(f"{response.status_code} - {response.text}")
+    chunks = []
+    for chunk in iter_completion_chunks(response):
+        chunks.append(chunk)
+        yield chunk
+    # The payload sets no sampling temperature, so a stored answer is as good as a fresh one
+    llm_cache.set(cache_key, "".join(chunks), expire=ttl)
+
+def iter_completion_chunks(response):
+    """
+    Yields the content deltas of a streamed (server-sent events) chat completion response.
+    """
+    with response:
+        # Lines stay as bytes so orjson can decode them without an intermediate str
+        for line in response.iter_lines():
+            # Skip keep-alive comments and blank separator lines
+            if not line or not line.startswith(b"data: "):
+                continue
+            data = line[len(b"data: "):]
+            if data == b"[DONE]":
+                break
+            content = orjson.loads(data)["choices"][0]["delta"].get("content")
+            if content:
+                yield content
+
+def render_workspace_metrics(workspace_data):
+    """
+    Renders the workspace summary as a grid of metric tiles, four per row.
+    """
+    st.subheader("📊 Workspace Summary")
+    cols = st.columns(4)
+    for idx, (key, value) in enumerate(workspace_data.items()):
+        cols[idx % 4].metric(label=key, value=value)
 
 # ----------------------- #
 # Streamlit UI
@@ -283,11 +573,22 @@ st.title("🚀 ClickUp Workspace Analysis")
 # Input fields available immediately
 api_key = st.text_input("🔑 Enter ClickUp API Key: (Optional)", type="password")
 if api_key:
-    workspaces = fetch_workspaces(api_key)
+    # Every widget interaction reruns the script; the workspaces are looked up once per entered key,
+    # which also keeps a rejected key from re-requesting /team on each rerun (failures are not cached).
+    # Only the key's hash is kept, and transient failures (None) are retried on the next rerun.
+    api_key_hash = hashlib.sha256(api_key.encode()).hexdigest()
+    if st.session_state.get("workspaces_key_hash") == api_key_hash:
+        workspaces = st.session_state["workspaces"]
+    else:
+        workspaces = fetch_workspaces(api_key)
+        if workspaces is not None:
+            st.session_state["workspaces"] = workspaces
+            st.session_state["workspaces_key_hash"] = api_key_hash
     if workspaces:
         workspace_id = st.selectbox("💼 Select Workspace:", options=list(workspaces.keys()), format_func=lambda x: workspaces[x])
     else:
         st.error("Failed to fetch workspaces. Please check your API key.")
+        workspace_id = None
 else:
     workspace_id = None
 
@@ -295,35 +596,36 @@ company_name = st.text_input("🏢 Enter Company Name (Optional):")
 use_case = st.text_area("🧑‍💻 Describe your company's use case:")
 
 if st.button("🚀 Let's Go!"):
+    # The company profile does not depend on the workspace, so it is generated while the crawl runs
+    company_profile = prefetch(get_company_info(company_name)) if company_name else None
+
+    workspace_data = None
     if api_key and workspace_id:
-        workspace_data = None
         with st.spinner("Fetching workspace data, may take longer for larger Workspaces..."):
             workspace_data = fetch_workspace_details(api_key, workspace_id)
+
+    # The recommendations need the workspace metrics, so they start once the crawl is done. Without a
+    # use case they would be generic filler, so the LLM call is skipped
+    recommendations = prefetch(get_ai_recommendations(use_case, company_name, workspace_data)) if use_case.strip() else None
+
+    if api_key and workspace_id:
         if workspace_data is None:
             st.error("Failed to fetch workspace data.")
         elif "error" in workspace_data:
             st.error(workspace_data["error"])
         else:
-            st.subheader("📊 Workspace Summary")
-            # Display workspace data as tiles
-            cols = st.columns(4)
-            for idx, (key, value) in enumerate(workspace_data.items()):
-                with cols[idx % 4]:
-                    st.metric(label=key, value=value)
-    else:
-        workspace_data = None
+            render_workspace_metrics(workspace_data)
 
-    # Build and display company profile if a company name is provided
-    if company_name:
-        with st.spinner("Generating company profile..."):
-            company_profile = get_company_info(company_name)
+    # Display company profile if a company name is provided
+    if company_profile is not None:
         st.subheader("🏢 Company Profile")
-        st.markdown(company_profile, unsafe_allow_html=True)
-    else:
-        company_profile = "No company information provided."
+        with st.spinner("Generating company profile..."):
+            st.write_stream(company_profile)
     
-    with st.spinner("Generating AI recommendations..."):
-        recommendations = get_ai_recommendations(use_case, company_profile, workspace_data)
-        st.markdown(recommendations, unsafe_allow_html=True)
+    if recommendations is None:
+        st.info("Enter a use case to get AI recommendations.")
+    else:
+        with st.spinner("Generating AI recommendations..."):
+            st.write_stream(recommendations)
 
 st.markdown("<div style='position: fixed; bottom: 10px; left: 10px; font-size: 12px; color: orange; '>A little tool made by: Yul 😊</div>", unsafe_allow_html=True)